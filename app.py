@@ -1,11 +1,21 @@
 import streamlit as st
-import subprocess, json, os
+import os
 from datetime import datetime
 import tempfile
+import shutil
+import subprocess
 import time
+import zipfile
 import logging
 import traceback
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import download_range_func
+from yt_dlp.version import __version__ as YTDLP_VERSION
+
 # ---------------- LOGGING CONFIG ----------------
 logging.basicConfig(
     level=logging.INFO,
@@ -13,7 +23,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger("YT-TRIMMER")
 
-logger.info("Application booted")
+@st.cache_resource
+def _log_boot():
+    # Streamlit re-executes the whole script per rerun; keep the boot log
+    # to once per process instead of once per interaction.
+    logger.info("Application booted | yt-dlp %s", YTDLP_VERSION)
+    return True
 
 # ---------------- CONFIG ----------------
 st.set_page_config(
@@ -22,42 +37,179 @@ st.set_page_config(
     layout="centered"
 )
 
+_log_boot()
+
 # ---------------- CUSTOM CSS ----------------
-st.markdown("""
-<style>
-body { background-color:#0f1117; }
-.block-container { max-width:950px; padding-top:2rem; }
-h1,h2,h3,h4,h5,p,label { color:#eaeaea !important; }
-input, select { background:#1c1f26 !important; color:white !important; }
-.stSlider > div { padding-top:1rem; }
-button[kind="primary"] {
-    background: linear-gradient(90deg,#ff416c,#ff4b2b);
-    color:white;
-    font-weight:600;
-    border-radius:12px;
-    height:3.2rem;
-}
-footer { visibility:hidden; }
-.metric-box {
-    background:#1c1f26;
-    padding:1rem;
-    border-radius:12px;
-    text-align:center;
+@st.cache_resource
+def _css():
+    with open(os.path.join("static", "app.css")) as f:
+        return f"<style>{f.read()}</style>"
+
+st.markdown(_css(), unsafe_allow_html=True)
+
+# ---------------- YT-DLP (IN-PROCESS) ----------------
+# Shared base options for the in-process yt-dlp calls: staying in-process
+# avoids a fresh interpreter start per click; each call builds its own
+# YoutubeDL from these since instances aren't thread-safe.
+_YDL_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "noplaylist": True,
+    "socket_timeout": 30,  # bounds abandoned probe threads
+    "extractor_args": {"youtube": {"player_client": ["android"]}},
 }
-</style>
-""", unsafe_allow_html=True)
+
+# Resolved once at boot: the downloads need ffmpeg to merge video+audio,
+# and a missing binary should surface here, not deep inside a trim.
+FFMPEG_PATH = shutil.which("ffmpeg")
+if FFMPEG_PATH is None:
+    logger.warning("ffmpeg not found on PATH — merged downloads will fail")
+
+# Clients raced for metadata: whichever YouTube answers first wins, so a
+# blocked client costs nothing instead of a full timeout before the next try.
+_PROBE_CLIENTS = ["android", "ios", "web"]
+
+
+def _probe_info(url, client):
+    opts = dict(_YDL_OPTS)
+    opts["extractor_args"] = {"youtube": {"player_client": [client]}}
+    with YoutubeDL(opts) as ydl:
+        return ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_video_info(url):
+    """Fetch video metadata once per URL; reruns hit the cache for an hour."""
+    # No `with` block: the context manager would join the remaining probes
+    # on exit, making every fetch wait for the slowest client. Shut down
+    # without waiting so the first success returns immediately and the
+    # losers are abandoned to finish (or time out) in the background.
+    ex = ThreadPoolExecutor(max_workers=len(_PROBE_CLIENTS))
+    futures = [ex.submit(_probe_info, url, c) for c in _PROBE_CLIENTS]
+    last_error = None
+    try:
+        for future in as_completed(futures):
+            try:
+                return future.result()
+            except Exception as e:
+                last_error = e
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+    raise last_error
+
+
+class _RingLogger:
+    """Keep only the last few yt-dlp log lines instead of the full stream."""
+
+    def __init__(self, maxlen=200):
+        self.lines = deque(maxlen=maxlen)
+
+    def debug(self, msg):
+        self.lines.append(msg)
+
+    info = warning = error = debug
+
+    def tail(self, n=20):
+        return "\n".join(list(self.lines)[-n:])
+
+
+def download_section(url, output_path, quality_format, start_sec, end_sec):
+    """Download only [start_sec, end_sec] of `url` into output_path."""
+    ring = _RingLogger()
+    opts = dict(_YDL_OPTS)
+    opts.update({
+        "format": quality_format,
+        "outtmpl": output_path,
+        "merge_output_format": "mp4",
+        "download_ranges": download_range_func(None, [(start_sec, end_sec)]),
+        "force_keyframes_at_cuts": True,
+        "concurrent_fragment_downloads": 8,
+        "http_chunk_size": 10 * 1024 * 1024,
+        "retries": 5,
+        "fragment_retries": 5,
+        # moov atom up front so browsers can start playback before the
+        # whole file arrives; still a copy-mux, no re-encode.
+        "postprocessor_args": {"ffmpeg": ["-movflags", "+faststart"]},
+        "logger": ring,
+    })
+    if FFMPEG_PATH:
+        opts["ffmpeg_location"] = FFMPEG_PATH
+    try:
+        with YoutubeDL(opts) as ydl:
+            ydl.download([url])
+    except Exception:
+        logger.error("yt-dlp download failed | last output:\n%s", ring.tail())
+        raise
+
+
+def trim_audio_direct(url, output_path, start_sec, end_sec):
+    """Trim audio straight off the CDN: resolve the direct stream URL and let
+    ffmpeg issue ranged HTTP reads for just the requested window, so only
+    trim_duration x bitrate bytes ever cross the network."""
+    info = fetch_video_info(url)
+    audio_formats = [
+        f for f in info.get("formats", [])
+        if f.get("url")
+        and f.get("acodec") not in (None, "none")
+        and f.get("vcodec") in (None, "none")
+    ]
+    # The .m4a output is copy-muxed, and the mp4 container only takes AAC —
+    # the highest-abr stream is usually Opus/webm, which ffmpeg rejects.
+    aac_formats = [
+        f for f in audio_formats
+        if (f.get("acodec") or "").startswith(("mp4a", "aac"))
+    ]
+    if not aac_formats:
+        # No compatible direct URL (DRM/livestream or Opus-only) — let
+        # yt-dlp download the section and handle the container itself
+        download_section(url, output_path, QUALITY_MAP["Audio Only"],
+                         start_sec, end_sec)
+        return
+
+    best = max(aac_formats, key=lambda f: f.get("abr") or 0)
+    try:
+        subprocess.run(
+            [
+                FFMPEG_PATH or "ffmpeg", "-y",
+                "-ss", str(start_sec),
+                "-t", str(end_sec - start_sec),
+                "-i", best["url"],
+                "-vn",
+                "-c", "copy",
+                output_path
+            ],
+            check=True
+        )
+    except subprocess.CalledProcessError:
+        # Direct URLs can 403 or the copy-mux can still balk; the slower
+        # yt-dlp path is the reliable fallback
+        logger.warning("Direct audio trim failed, falling back to yt-dlp")
+        download_section(url, output_path, QUALITY_MAP["Audio Only"],
+                         start_sec, end_sec)
+
 
 # ---------------- UTILS ----------------
+QUALITY_MAP = {
+    "Best Available": "bestvideo+bestaudio/best",
+    "1080p": "bestvideo[height<=1080]+bestaudio/best",
+    "720p": "bestvideo[height<=720]+bestaudio/best",
+    "480p": "bestvideo[height<=480]+bestaudio/best",
+    "Audio Only": "bestaudio"
+}
+
+
 def seconds_to_hms(sec):
-    h = sec // 3600
-    m = (sec % 3600) // 60
-    s = sec % 60
+    m, s = divmod(sec, 60)
+    h, m = divmod(m, 60)
     return f"{h:02}:{m:02}:{s:02}"
 
 # ---------------- STATE ----------------
 st.session_state.setdefault("video_loaded", False)
-st.session_state.setdefault("output_bytes", None)
+st.session_state.setdefault("file_path", None)
 st.session_state.setdefault("file_name", None)
+st.session_state.setdefault("mime", "video/mp4")
+st.session_state.setdefault("batch_ranges", [])
+st.session_state.setdefault("batch_zip_path", None)
 
 # ---------------- HEADER ----------------
 st.markdown("## 🎬 YouTube Stream Trimmer Pro")
@@ -79,20 +231,15 @@ if st.button("LOAD VIDEO", width="stretch"):
     else:
         with st.spinner("Fetching video information..."):
             try:
-                data = json.loads(
-                    subprocess.check_output(
-                        ["yt-dlp", "--dump-json", url],
-                        stderr=subprocess.PIPE
-                    )
-                )
+                data = fetch_video_info(url)
                 st.session_state.video_loaded = True
                 st.session_state.duration = int(data["duration"])
                 st.session_state.title = data.get("title", "Unknown")
                 st.session_state.thumbnail = data.get("thumbnail")
 
                 logger.info(
-                    f"Video loaded | Title='{st.session_state.title}' "
-                    f"| Duration={st.session_state.duration}s"
+                    "Video loaded | Title=%r | Duration=%ds",
+                    st.session_state.title, st.session_state.duration
                 )
 
             except Exception:
@@ -101,8 +248,6 @@ if st.button("LOAD VIDEO", width="stretch"):
 
 # ---------------- MAIN UI ----------------
 if st.session_state.video_loaded:
-    logger.info("Rendering main UI")
-
     st.markdown("---")
     col1, col2 = st.columns([1, 3])
 
@@ -113,47 +258,49 @@ if st.session_state.video_loaded:
         st.markdown(f"### {st.session_state.title}")
         st.markdown(f"**Total Duration:** `{seconds_to_hms(st.session_state.duration)}`")
 
-    st.markdown("### 🎚 Quality")
-    quality = st.selectbox(
-        "Choose download quality",
-        ["Best Available", "1080p", "720p", "480p", "Audio Only"]
-    )
-
-    quality_map = {
-        "Best Available": "bestvideo+bestaudio/best",
-        "1080p": "bestvideo[height<=1080]+bestaudio/best",
-        "720p": "bestvideo[height<=720]+bestaudio/best",
-        "480p": "bestvideo[height<=480]+bestaudio/best",
-        "Audio Only": "bestaudio"
-    }
-
-    st.markdown("## ✂ Trim Timeline")
-    start_sec, end_sec = st.slider(
-        "Trim Range",
-        0,
-        st.session_state.duration,
-        (0, st.session_state.duration),
-        step=1,
-        label_visibility="collapsed"
-    )
-
-    trim_duration = end_sec - start_sec
-
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Start", seconds_to_hms(start_sec))
-    c2.metric("End", seconds_to_hms(end_sec))
-    c3.metric("Duration", seconds_to_hms(trim_duration))
-
-    st.markdown("### ▶ Preview (Trim Start)")
-    st.video(url, start_time=start_sec)
-
-    output_name = st.text_input(
-        "Output File Name",
-        value=f"youtube_trim_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    )
+    # Form so slider drags / quality changes don't rerun the heavy path —
+    # the script only sees new values when the submit button is pressed.
+    with st.form("trim_form"):
+        st.markdown("### 🎚 Quality")
+        quality = st.selectbox(
+            "Choose download quality",
+            ["Best Available", "1080p", "720p", "480p", "Audio Only"]
+        )
+
+        st.markdown("## ✂ Trim Timeline")
+        start_sec, end_sec = st.slider(
+            "Trim Range",
+            0,
+            st.session_state.duration,
+            (0, st.session_state.duration),
+            step=1,
+            label_visibility="collapsed"
+        )
+
+        trim_duration = end_sec - start_sec
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Start", seconds_to_hms(start_sec))
+        c2.metric("End", seconds_to_hms(end_sec))
+        c3.metric("Duration", seconds_to_hms(trim_duration))
+
+        st.markdown("### ▶ Preview (Trim Start)")
+        st.video(url, start_time=start_sec)
+
+        output_name = st.text_input(
+            "Output File Name",
+            value=f"youtube_trim_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+
+        submitted = st.form_submit_button(
+            "⬇ TRIM & DOWNLOAD", type="primary", width="stretch"
+        )
+        add_to_batch = st.form_submit_button(
+            "➕ ADD TO BATCH", width="stretch"
+        )
 
 # ---------------- SINGLE ACTION BUTTON ----------------
-if st.button("⬇ TRIM & DOWNLOAD", type="primary", width="stretch"):
+if st.session_state.video_loaded and submitted:
     logger.info("TRIM & DOWNLOAD clicked")
 
     if trim_duration <= 0:
@@ -162,45 +309,125 @@ if st.button("⬇ TRIM & DOWNLOAD", type="primary", width="stretch"):
         with st.spinner("Fast trimming in progress..."):
             try:
                 t0 = time.time()
-                with tempfile.TemporaryDirectory() as tmpdir:
-                    output_path = os.path.join(tmpdir, f"{output_name}.mp4")
 
+                # Drop the previous trim's whole directory so neither the
+                # file nor its mkdtemp shell piles up in temp
+                if st.session_state.file_path and os.path.exists(st.session_state.file_path):
+                    shutil.rmtree(
+                        os.path.dirname(st.session_state.file_path),
+                        ignore_errors=True,
+                    )
+
+                outdir = tempfile.mkdtemp(prefix="yt_trim_")
+
+                if quality == "Audio Only":
+                    output_path = os.path.join(outdir, f"{output_name}.m4a")
+                    logger.info("Starting direct audio trim")
+                    trim_audio_direct(url, output_path, start_sec, end_sec)
+                    st.session_state.mime = "audio/mp4"
+                else:
+                    output_path = os.path.join(outdir, f"{output_name}.mp4")
                     logger.info("Starting yt-dlp partial download")
-                    subprocess.run(
-                        [
-                            "yt-dlp",
-                            "-f", quality_map[quality],
-                            "--download-sections",
-                            f"*{start_sec}-{end_sec}",
-                            "--merge-output-format", "mp4",
-                            "--concurrent-fragments", "8",
-                            "--retries", "5",
-                            "--fragment-retries", "5",
-                            "-o", output_path,
-                            url
-                        ],
-                        check=True
+                    download_section(
+                        url, output_path, QUALITY_MAP[quality],
+                        start_sec, end_sec
                     )
+                    st.session_state.mime = "video/mp4"
 
-                    with open(output_path, "rb") as f:
-                        st.session_state.output_bytes = f.read()
-                        st.session_state.file_name = f"{output_name}.mp4"
+                st.session_state.file_path = output_path
+                st.session_state.file_name = os.path.basename(output_path)
 
                 logger.info(
-                    f"Trim ready | Size={len(st.session_state.output_bytes)} bytes "
-                    f"| Time taken={round(time.time()-t0,2)}s"
+                    "Trim ready | Size=%d bytes | Time taken=%.2fs",
+                    os.path.getsize(output_path), time.time() - t0
                 )
 
             except Exception:
                 logger.error(traceback.format_exc())
                 st.error("Processing failed.")
 
-    if st.session_state.output_bytes:
+# Rendered outside the submit branch so the button survives later reruns
+if st.session_state.video_loaded:
+    if st.session_state.file_path and os.path.exists(st.session_state.file_path):
         st.download_button(
             "⬇ Download Trimmed Video",
-            data=st.session_state.output_bytes,
+            data=open(st.session_state.file_path, "rb"),
             file_name=st.session_state.file_name,
-            mime="video/mp4",
+            mime=st.session_state.mime,
+            width="stretch"
+        )
+
+# ---------------- BATCH TRIMS ----------------
+if st.session_state.video_loaded and add_to_batch:
+    if trim_duration <= 0:
+        st.error("End time must be greater than start time.")
+    else:
+        st.session_state.batch_ranges.append(
+            (start_sec, end_sec, output_name, quality)
+        )
+        logger.info("Range queued for batch | %ss-%ss", start_sec, end_sec)
+
+if st.session_state.video_loaded and st.session_state.batch_ranges:
+    st.markdown("### 📦 Batch Queue")
+    for i, (s, e, name, q) in enumerate(st.session_state.batch_ranges, 1):
+        st.markdown(
+            f"`{i}.` **{name}** — {seconds_to_hms(s)} → {seconds_to_hms(e)} ({q})"
+        )
+
+    if st.button(
+        f"⬇ TRIM BATCH ({len(st.session_state.batch_ranges)} clips)",
+        width="stretch"
+    ):
+        with st.spinner("Trimming batch in parallel..."):
+            try:
+                t0 = time.time()
+
+                # Drop the previous batch so dirs don't pile up in temp
+                if st.session_state.batch_zip_path and os.path.exists(st.session_state.batch_zip_path):
+                    shutil.rmtree(
+                        os.path.dirname(st.session_state.batch_zip_path),
+                        ignore_errors=True,
+                    )
+                    st.session_state.batch_zip_path = None
+
+                outdir = tempfile.mkdtemp(prefix="yt_batch_")
+
+                def _trim_one(rng):
+                    s, e, name, q = rng
+                    path = os.path.join(outdir, f"{name}.mp4")
+                    download_section(url, path, QUALITY_MAP[q], s, e)
+                    return path
+
+                # Section downloads are I/O-bound, so the clips genuinely
+                # run in parallel and the batch takes max() not sum().
+                with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as ex:
+                    paths = list(ex.map(_trim_one, st.session_state.batch_ranges))
+
+                zip_path = os.path.join(outdir, "youtube_trims.zip")
+                with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zf:
+                    for path in paths:
+                        zf.write(path, os.path.basename(path))
+
+                # The zip holds the only copy users download; the loose
+                # clips just double the disk footprint
+                for path in paths:
+                    os.remove(path)
+
+                st.session_state.batch_zip_path = zip_path
+                logger.info(
+                    "Batch ready | Clips=%d | Time taken=%.2fs",
+                    len(paths), time.time() - t0
+                )
+            except Exception:
+                logger.error(traceback.format_exc())
+                st.error("Batch processing failed.")
+
+    if st.session_state.batch_zip_path and os.path.exists(st.session_state.batch_zip_path):
+        st.download_button(
+            "⬇ Download Batch (ZIP)",
+            data=open(st.session_state.batch_zip_path, "rb"),
+            file_name="youtube_trims.zip",
+            mime="application/zip",
             width="stretch"
         )
 
@@ -210,5 +437,3 @@ st.markdown(
     "<p style='text-align:center;color:#777;'>Developed by <b>Darpan</b> 🚀</p>",
     unsafe_allow_html=True
 )
-
-logger.info("App render cycle completed")
@@ -6,8 +6,10 @@ import tempfile
 import logging
 from datetime import datetime
 import traceback
-from functools import wraps
+from collections import deque
+from functools import lru_cache, wraps
 import shutil
+import random
 import re
 import uuid
 import threading
@@ -16,13 +18,130 @@ import sys
 import urllib.request
 import urllib.parse
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadError
+
+# orjson's C encoder is several times faster than stdlib json — it runs on
+# every SSE tick — but keep a stdlib fallback so the app still works without it
+try:
+    import orjson
+
+    def jdumps(obj):
+        return orjson.dumps(obj).decode()
+
+    jloads = orjson.loads
+except ImportError:
+    orjson = None
+    jdumps = json.dumps
+    jloads = json.loads
 
 app = Flask(__name__)
 
-# In-memory task store for progress tracking
+if orjson is not None:
+    from flask.json.provider import JSONProvider
+
+    class _OrjsonProvider(JSONProvider):
+        """Back jsonify()/get_json() with orjson instead of stdlib json."""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = _OrjsonProvider(app)
+
+# In-memory task store for progress tracking. tasks_lock guards only the
+# dict itself (insert/lookup/remove); each task carries its own lock and
+# condition so progress updates on one task never contend with another's.
 tasks = {}
 tasks_lock = threading.Lock()
 
+# Bounded worker pool for trim jobs: unbounded threads let N concurrent
+# requests oversubscribe CPU/NIC until every download crawls. Extra jobs
+# queue inside the executor and surface to the client as phase 'Queued'.
+MAX_JOBS = int(os.getenv('MAX_JOBS', '4'))
+_executor = ThreadPoolExecutor(max_workers=MAX_JOBS)
+
+# Tmpdir deletion happens off the request thread: a fragment-heavy
+# directory can take a while to unlink and the client gains nothing by
+# waiting for it.
+_cleanup_pool = ThreadPoolExecutor(max_workers=2)
+
+# Transfer tuning, env-overridable per deployment: larger HTTP chunks mean
+# fewer request round-trips per fragment; fragment fan-out caps how many
+# parallel connections one job opens. Only YouTube URLs are accepted, so a
+# single set of knobs replaces any per-host table.
+HTTP_CHUNK_SIZE = os.getenv('YTDLP_HTTP_CHUNK_SIZE', '10M')
+MAX_CONCURRENT_FRAGMENTS = int(os.getenv('YTDLP_CONCURRENT_FRAGMENTS', '16'))
+
+# Per-job share of the fragment budget: MAX_CONCURRENT_FRAGMENTS is the
+# aggregate ceiling across the MAX_JOBS pooled downloads, so each job
+# gets the divided slice and the total stays roughly constant at
+# saturation. The legacy endpoint uses the same per-job value.
+CONCURRENT_FRAGMENTS = max(2, MAX_CONCURRENT_FRAGMENTS // MAX_JOBS)
+
+# Upper bound on tracked tasks; the janitor evicts oldest beyond this
+MAX_TRACKED_TASKS = int(os.getenv('MAX_TRACKED_TASKS', '1000'))
+
+# Identical trims share a task instead of downloading the same section
+# twice: while one is in flight (e.g. double-clicked Trim) and, after it
+# completes, for as long as the finished file survives on disk — the
+# janitor's 15-minute retention doubles as the cache eviction policy.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Nudges the cleanup thread out of a long idle wait when new work appears
+_cleanup_wakeup = threading.Event()
+
+
+def _set_task(task_id, **fields):
+    """Update task fields under the task's own lock and wake SSE waiters.
+
+    Every mutation bumps the task's version counter and notifies its
+    condition, so progress streams wake on change instead of polling.
+    """
+    with tasks_lock:
+        task = tasks.get(task_id)
+    if task is None:
+        return
+    with task['lock']:
+        # Only a real change bumps the version: identical coalesced progress
+        # ticks neither wake SSE waiters nor produce duplicate frames
+        changed = False
+        for key, value in fields.items():
+            if task.get(key) != value:
+                task[key] = value
+                changed = True
+        if changed:
+            task['version'] += 1
+            task['cond'].notify_all()
+
+
+def _mark_removed(task_id, task):
+    """Wake SSE waiters on a popped task and retire its dedup mapping."""
+    with task['lock']:
+        task['removed'] = True
+        task['version'] += 1
+        task['cond'].notify_all()
+    # A dead task must not keep soaking up identical requests
+    dedupe_key = task.get('dedupe_key')
+    if dedupe_key is not None:
+        with _inflight_lock:
+            if _inflight.get(dedupe_key) == task_id:
+                del _inflight[dedupe_key]
+
+
+def _drop_task(task_id):
+    """Remove a task from the store and wake any SSE stream waiting on it."""
+    with tasks_lock:
+        task = tasks.pop(task_id, None)
+    if task is not None:
+        _mark_removed(task_id, task)
+    return task
+
 # Configuration
 app.config['MAX_CONTENT_LENGTH'] = 2000 * 1024 * 1024  # 2GB limit
 DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
@@ -48,33 +167,72 @@ logger.info(f"Temp directory: {tempfile.gettempdir()}")
 logger.info(f"DEBUG mode: {DEBUG}")
 logger.info(f"HOST: {HOST} | PORT: {PORT}")
 
+# Tool-version probes are cached to disk keyed by the binary's mtime, so
+# each gunicorn worker boot skips the ~1-3s of serialized subprocess
+# launches unless a binary actually changed.
+_PROBE_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'yt_trimmer_env.json')
+
+
+def _probe_version(binary, args):
+    """Return the first line of `binary args` output, or None if missing.
+
+    Results are cached in a JSON file keyed by the resolved path and its
+    mtime; a re-probe only happens when the binary was (re)installed.
+    """
+    path = shutil.which(binary)
+    if path is None:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    key = f"{path}:{mtime}"
+    try:
+        with open(_PROBE_CACHE_PATH, 'rb') as fh:
+            cache = jloads(fh.read())
+    except Exception:
+        cache = {}
+    if key in cache:
+        return cache[key]
+    try:
+        result = subprocess.run([binary] + args, capture_output=True, text=True, timeout=10)
+        # partition stops at the first newline without building a line list
+        version = result.stdout.partition('\n')[0].strip() if result.returncode == 0 else None
+    except Exception:
+        return None
+    cache[key] = version
+    try:
+        with open(_PROBE_CACHE_PATH, 'w') as fh:
+            fh.write(jdumps(cache))
+    except OSError:
+        pass
+    return version
+
+
 # Check yt-dlp availability
-try:
-    _ytdlp_version = subprocess.run(
-        ['yt-dlp', '--version'], capture_output=True, text=True, timeout=10
-    )
-    logger.info(f"yt-dlp version: {_ytdlp_version.stdout.strip()}")
-except Exception as e:
-    logger.critical(f"yt-dlp NOT FOUND or broken: {e}")
+_ytdlp_version_str = _probe_version('yt-dlp', ['--version'])
+if _ytdlp_version_str:
+    logger.info(f"yt-dlp version: {_ytdlp_version_str}")
+else:
+    logger.critical("yt-dlp NOT FOUND or broken")
 
 # Check ffmpeg availability
-try:
-    _ffmpeg_version = subprocess.run(
-        ['ffmpeg', '-version'], capture_output=True, text=True, timeout=10
-    )
-    _ffmpeg_first_line = _ffmpeg_version.stdout.split('\n')[0] if _ffmpeg_version.stdout else 'unknown'
-    logger.info(f"ffmpeg: {_ffmpeg_first_line}")
-except Exception as e:
-    logger.critical(f"ffmpeg NOT FOUND or broken: {e}")
+_ffmpeg_version_str = _probe_version('ffmpeg', ['-version'])
+if _ffmpeg_version_str:
+    logger.info(f"ffmpeg: {_ffmpeg_version_str}")
+else:
+    logger.critical("ffmpeg NOT FOUND or broken")
 
-# Check Node.js availability (needed by PO token provider)
-try:
-    _node_version = subprocess.run(
-        ['node', '--version'], capture_output=True, text=True, timeout=10
-    )
-    logger.info(f"Node.js version: {_node_version.stdout.strip()}")
-except Exception as e:
-    logger.warning(f"Node.js not found: {e} (PO token provider won't work)")
+# Check Node.js availability (needed by PO token provider and JS runtime)
+_node_version_str = _probe_version('node', ['--version'])
+if _node_version_str:
+    logger.info(f"Node.js version: {_node_version_str}")
+else:
+    logger.warning("Node.js not found (PO token provider won't work)")
+
+# Resolve tool paths once so every subprocess launch skips the PATH search
+YTDLP_BIN = shutil.which('yt-dlp') or 'yt-dlp'
+FFMPEG_BIN = shutil.which('ffmpeg') or 'ffmpeg'
 
 # Check PO token provider
 POT_PROVIDER_AVAILABLE = False
@@ -88,17 +246,32 @@ except ImportError:
 
 logger.info("="*60)
 
-# Temporary directory for downloads
-TEMP_DIR = tempfile.gettempdir()
+# Temporary directory for downloads. Prefer tmpfs when it has headroom:
+# the download/remux/serve cycle then never touches real disk.
+def _pick_temp_dir():
+    try:
+        if os.path.isdir('/dev/shm') and shutil.disk_usage('/dev/shm').free > 2 << 30:
+            path = '/dev/shm/yttrim'
+            os.makedirs(path, exist_ok=True)
+            return path
+    except OSError:
+        pass
+    return tempfile.gettempdir()
 
-# Check if Node.js is available for yt-dlp JS runtime
-NODE_AVAILABLE = False
-try:
-    _node_check = subprocess.run(['node', '--version'], capture_output=True, text=True, timeout=5)
-    if _node_check.returncode == 0:
-        NODE_AVAILABLE = True
-        logger.info(f"Node.js JS runtime available for yt-dlp: {_node_check.stdout.strip()}")
-except Exception:
+
+TEMP_DIR = _pick_temp_dir()
+
+# Persistent yt-dlp cache shared by all tasks, so the player-JS signature
+# decipher and nsig cache survive across extractions instead of being
+# rebuilt on every run
+YTDLP_CACHE_DIR = os.path.join(TEMP_DIR, 'ytdlp-cache')
+os.makedirs(YTDLP_CACHE_DIR, exist_ok=True)
+
+# Node.js availability doubles as the yt-dlp JS runtime check (probed once above)
+NODE_AVAILABLE = _node_version_str is not None
+if NODE_AVAILABLE:
+    logger.info(f"Node.js JS runtime available for yt-dlp: {_node_version_str}")
+else:
     logger.warning("Node.js not available — yt-dlp may not bypass YouTube bot detection")
 
 
@@ -109,20 +282,97 @@ def _progress_bar(pct, width=20):
 
 
 # ==================== UTILITY FUNCTIONS ====================
+# Precompiled at module scope: these run on every API call and, for the
+# progress patterns, on every line yt-dlp/ffmpeg emits during a download.
+# One alternation covers all hosts (the /live and /shorts variants were
+# subsumed by the youtube.com branch), so validation is a single scan
+_YOUTUBE_URL_RE = re.compile(r'(?:https?://)?(?:www\.)?(?:youtube\.com|youtu\.be)')
+# Character-class substitution needs no regex at all: translate runs in
+# the C unicode layer
+_SAFE_FILENAME_TABLE = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+_VIDEO_ID_PATTERNS = [
+    re.compile(r'(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/|youtube\.com/v/|youtube\.com/shorts/|youtube\.com/live/)([a-zA-Z0-9_-]{11})'),
+    re.compile(r'(?:youtube\.com/watch\?.*v=)([a-zA-Z0-9_-]{11})'),
+]
+_FFMPEG_TIME_RE = re.compile(r'time=(\d+):(\d+):(\d+\.?\d*)')
+_FFMPEG_SPEED_RE = re.compile(r'speed=\s*(\S+)')
+_FFMPEG_SIZE_RE = re.compile(r'size=\s*(\S+)')
+_DOWNLOAD_PCT_RE = re.compile(r'(\d+\.?\d*)%')
+# Bot-detection / format errors worth retrying with a different player
+# client, compiled to one alternation so classification is a single scan
+# of the (often long) error output instead of ten substring searches
+_RETRIABLE_ERR_RE = re.compile(
+    r'sign in|bot|confirm|cookies|authentication'
+    r'|requested format|not available|format is not'
+    r'|no video formats|unavailable'
+)
+
+
+# Spellings that cover almost every real submission; checked with one
+# C-level startswith before any regex runs
+_YT_URL_PREFIXES = (
+    'https://www.youtube.com/', 'https://youtube.com/', 'https://youtu.be/',
+    'https://m.youtube.com/', 'http://www.youtube.com/', 'http://youtube.com/',
+    'http://youtu.be/', 'www.youtube.com/', 'youtube.com/', 'youtu.be/',
+)
+
+
+@lru_cache(maxsize=4096)
 def is_valid_youtube_url(url):
     """Validate if URL is a valid YouTube URL"""
-    youtube_patterns = [
-        r'(?:https?://)?(?:www\.)?youtube\.com',
-        r'(?:https?://)?(?:www\.)?youtu\.be',
-        r'(?:https?://)?(?:www\.)?youtube\.com/live',
-        r'(?:https?://)?(?:www\.)?youtube\.com/shorts'
-    ]
-    return any(re.search(pattern, url) for pattern in youtube_patterns)
+    if url.startswith(_YT_URL_PREFIXES):
+        return True
+    return _YOUTUBE_URL_RE.search(url) is not None
 
 def sanitize_filename(filename):
     """Remove special characters from filename"""
-    filename = str(filename)[:100]  # Limit to 100 chars
-    return re.sub(r'[<>:"/\\|?*]', '_', filename)
+    return str(filename)[:100].translate(_SAFE_FILENAME_TABLE)  # Limit to 100 chars
+
+def _rmtree_with_size(path):
+    """Delete a directory tree and return the bytes freed.
+
+    Size accounting is fused into the delete walk, so each entry is
+    visited once instead of being sized in one traversal and removed in
+    a second.
+    """
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += _rmtree_with_size(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                        os.unlink(entry.path)
+                except OSError:
+                    continue
+        os.rmdir(path)
+    except OSError:
+        pass
+    return total
+
+
+def find_output_file(tmpdir, filename, expected_path):
+    """Locate the finished output file.
+
+    The expected path ({filename}.{mp3|mp4}) is the common case, so stat it
+    directly before falling back to a single scandir pass — yt-dlp may have
+    changed the extension during merge.
+    """
+    try:
+        if os.path.getsize(expected_path) > 0:
+            return expected_path
+    except OSError:
+        pass
+    try:
+        with os.scandir(tmpdir) as entries:
+            for entry in entries:
+                if entry.name.startswith(filename) and entry.is_file():
+                    return entry.path
+    except OSError:
+        pass
+    return None
 
 # ==================== PIPED API FALLBACK ====================
 # Piped is an open-source YouTube frontend that proxies requests through its own servers
@@ -138,12 +388,8 @@ PIPED_INSTANCES = [
 
 def extract_video_id(url):
     """Extract YouTube video ID from various URL formats"""
-    patterns = [
-        r'(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/|youtube\.com/v/|youtube\.com/shorts/|youtube\.com/live/)([a-zA-Z0-9_-]{11})',
-        r'(?:youtube\.com/watch\?.*v=)([a-zA-Z0-9_-]{11})',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in _VIDEO_ID_PATTERNS:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     return None
@@ -157,7 +403,7 @@ def _piped_request(path, instance_url, timeout=20):
     })
     try:
         with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return json.loads(resp.read().decode('utf-8'))
+            return jloads(resp.read())
     except Exception as e:
         logger.debug(f"Piped request failed: {instance_url}{path} | {e}")
         return None
@@ -254,7 +500,7 @@ def trim_with_ffmpeg_streams(video_url, audio_url, output_path, start_time, end_
         if not audio_url:
             return False, "No audio stream available"
         cmd = [
-            'ffmpeg', '-y',
+            FFMPEG_BIN, '-y',
             '-ss', str(start_time),
             '-t', str(duration),
             '-i', audio_url,
@@ -268,7 +514,7 @@ def trim_with_ffmpeg_streams(video_url, audio_url, output_path, start_time, end_
         if not video_url:
             return False, "No video stream available"
         
-        cmd = ['ffmpeg', '-y', '-ss', str(start_time), '-t', str(duration)]
+        cmd = [FFMPEG_BIN, '-y', '-ss', str(start_time), '-t', str(duration)]
         
         # Add video input
         cmd.extend(['-i', video_url])
@@ -291,7 +537,8 @@ def trim_with_ffmpeg_streams(video_url, audio_url, output_path, start_time, end_
                 output_path
             ])
     
-    logger.info(f"ffmpeg direct trim: {' '.join(cmd[:8])} ...")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("ffmpeg direct trim: %s ...", ' '.join(cmd[:8]))
     
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
@@ -309,15 +556,21 @@ def trim_with_ffmpeg_streams(video_url, audio_url, output_path, start_time, end_
         logger.error(f"ffmpeg direct trim: EXCEPTION: {e}")
         return False, str(e)
 
+# Escape hatch for hosts with broken TLS interception; off by default so
+# downloads keep full certificate verification.
+ALLOW_INSECURE_TLS = os.getenv('ALLOW_INSECURE_TLS', 'False').lower() == 'true'
+
 def get_ytdlp_base_args(player_client=None):
     """Return common yt-dlp arguments with anti-bot measures"""
     args = [
-        'yt-dlp',
-        '--no-check-certificates',
+        YTDLP_BIN,
         '--no-playlist',
         '--socket-timeout', '30',
         '--extractor-retries', '5',
+        '--cache-dir', YTDLP_CACHE_DIR,
     ]
+    if ALLOW_INSECURE_TLS:
+        args.append('--no-check-certificates')
 
     # Realistic browser headers to avoid bot fingerprinting
     args.extend([
@@ -347,70 +600,157 @@ PLAYER_CLIENT_STRATEGIES = [
     None,                # Default (last resort — may trigger bot detection on servers)
 ]
 
-def run_ytdlp_with_retry(extra_args, url, timeout=60, description="yt-dlp"):
+# Format selectors per quality tier, shared by both trim endpoints. The
+# pre-merged best[...][ext=mp4] branches come before the bare 'best' catch-all
+# so single-file formats are preferred over a merge when heights match.
+QUALITY_FORMATS = {
+    'best': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best[ext=mp4]/best',
+    '1080': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<=1080]+bestaudio/best[height<=1080][ext=mp4]/best',
+    '720': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<=720]+bestaudio/best[height<=720][ext=mp4]/best',
+    '480': 'bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<=480]+bestaudio/best[height<=480][ext=mp4]/best',
+    'audio': 'bestaudio[ext=m4a]/bestaudio',
+}
+
+# Decaying success scoreboard over the strategies: the client that has been
+# working lately gets tried first, so when YouTube starts blocking the usual
+# winner the failure cost is paid once instead of on every request.
+_client_scores = {c: 1.0 for c in PLAYER_CLIENT_STRATEGIES}
+_client_scores_lock = threading.Lock()
+
+
+def _ordered_clients():
+    """Player-client strategies sorted by decaying success rate, best first."""
+    with _client_scores_lock:
+        return sorted(PLAYER_CLIENT_STRATEGIES,
+                      key=lambda c: _client_scores[c], reverse=True)
+
+
+def _record_client_result(client, success):
+    with _client_scores_lock:
+        if success:
+            _client_scores[client] = 0.9 * _client_scores[client] + 0.1
+        else:
+            _client_scores[client] *= 0.7
+
+def get_ydl_opts(player_client=None):
+    """Return YoutubeDL options mirroring get_ytdlp_base_args for in-process use"""
+    opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'nocheckcertificate': ALLOW_INSECURE_TLS,
+        'noplaylist': True,
+        'socket_timeout': 30,
+        'extractor_retries': 5,
+        'cachedir': YTDLP_CACHE_DIR,
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+            'Referer': 'https://www.youtube.com/',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        },
+    }
+    if player_client:
+        opts['extractor_args'] = {'youtube': {'player_client': [player_client]}}
+    return opts
+
+
+# TTL cache for /api/get-video-info responses keyed by the 11-char video ID:
+# a repeat lookup returns in microseconds instead of re-running extraction.
+INFO_CACHE_TTL = 3600
+INFO_CACHE_MAX = 2048
+_info_cache = {}  # video_id -> (expires_at, payload)
+_info_cache_lock = threading.Lock()
+
+
+def _info_cache_get(video_id, allow_stale=False):
+    """Return the cached payload, or None.
+
+    Expired entries are kept (capacity eviction reclaims them) so that
+    `allow_stale=True` can serve the last known-good response when every
+    live extraction path has failed — stale metadata beats an error page.
     """
-    Run yt-dlp with automatic retry using different player clients.
-    First tries without any player_client restriction (most compatible).
-    Only falls back to specific clients on bot-detection errors.
-    Returns (success, result) tuple.
+    with _info_cache_lock:
+        entry = _info_cache.get(video_id)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if time.time() > expires_at and not allow_stale:
+            return None
+        # Re-insert so dict order tracks recency and eviction is LRU
+        del _info_cache[video_id]
+        _info_cache[video_id] = entry
+        return payload
+
+
+def _info_cache_put(video_id, payload):
+    with _info_cache_lock:
+        if len(_info_cache) >= INFO_CACHE_MAX:
+            # Drop expired entries first; if still full, drop the oldest
+            now = time.time()
+            for vid in [v for v, (exp, _) in _info_cache.items() if exp < now]:
+                del _info_cache[vid]
+            while len(_info_cache) >= INFO_CACHE_MAX:
+                # Insertion order doubles as recency order (gets re-insert),
+                # so the head is the least recently used entry
+                _info_cache.pop(next(iter(_info_cache)))
+        _info_cache[video_id] = (time.time() + INFO_CACHE_TTL, payload)
+
+
+def _retry_delay(attempt):
+    """Exponential backoff with jitter, capped at 1.5s.
+
+    Failed player clients usually reject within a second (bot check), so a
+    fixed 2s sleep between all 7 strategies mostly punished the user; a
+    short growing delay still avoids hammering YouTube between attempts.
     """
-    last_result = None
-    last_stderr = ""
-    
-    for i, client in enumerate(PLAYER_CLIENT_STRATEGIES):
-        cmd = get_ytdlp_base_args(player_client=client) + extra_args + [url]
-        
+    return min(0.1 * (2 ** attempt) + random.uniform(0, 0.05), 1.5)
+
+
+def extract_info_with_retry(url, description="extract_info"):
+    """
+    Fetch video metadata in-process with automatic retry using different
+    player clients — no subprocess spawn, no JSON dump/re-parse.
+    Returns the info dict, or raises the last DownloadError.
+    """
+    last_error = None
+
+    strategies = _ordered_clients()
+    for i, client in enumerate(strategies):
         client_name = client or 'default'
         if i == 0:
-            logger.info(f"{description}: Trying player_client={client_name} | URL: {url}")
+            logger.info("%s: Trying player_client=%s | URL: %s", description, client_name, url)
         else:
-            logger.info(f"{description}: Retry #{i} with player_client={client_name} | URL: {url}")
-        
-        logger.debug(f"Command: {' '.join(cmd)}")
-        
+            logger.info("%s: Retry #%d with player_client=%s | URL: %s", description, i, client_name, url)
+
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-            last_result = result
-            
-            if result.returncode == 0:
-                logger.info(f"{description}: SUCCESS with player_client={client_name}")
-                return True, result
-            
-            last_stderr = result.stderr.strip() if result.stderr else ''
-            logger.warning(f"{description}: FAILED with player_client={client_name} | Exit: {result.returncode} | Error: {last_stderr[:200]}")
-            
+            with YoutubeDL(get_ydl_opts(player_client=client)) as ydl:
+                info = ydl.extract_info(url, download=False)
+            logger.info("%s: SUCCESS with player_client=%s", description, client_name)
+            _record_client_result(client, True)
+            return info
+        except DownloadError as e:
+            last_error = e
+            error_text = str(e).lower()
+            logger.warning(f"{description}: FAILED with player_client={client_name} | Error: {str(e)[:200]}")
+
             # Retry with next client on bot-detection, auth errors, OR format errors
             # (some player clients don't support certain video types like live streams)
-            stderr_lower = last_stderr.lower()
-            is_retriable = any(kw in stderr_lower for kw in [
-                'sign in', 'bot', 'confirm', 'cookies', 'authentication',
-                'requested format', 'not available', 'format is not',
-                'no video formats', 'unavailable',
-            ])
-            
+            is_retriable = _RETRIABLE_ERR_RE.search(error_text) is not None
+
             if not is_retriable:
                 # Truly unrecoverable error — retrying with different client won't help
-                logger.info(f"{description}: Error is not retriable, skipping further retries")
+                # (video-specific, so the client's score is not punished)
+                logger.info("%s: Error is not retriable, skipping further retries", description)
                 break
-            
-            logger.info(f"{description}: Retriable error detected, waiting 2s before trying next client...")
-            time.sleep(2)  # Small delay between retries to avoid rate-limiting
-        
-        except subprocess.TimeoutExpired:
-            logger.error(f"{description}: TIMEOUT with player_client={client_name} after {timeout}s")
-            last_result = None
-            last_stderr = f"Timeout after {timeout}s"
-            continue
-    
+
+            _record_client_result(client, False)
+            delay = _retry_delay(i)
+            logger.info("%s: Retriable error detected, backing off %.2fs before next client...", description, delay)
+            time.sleep(delay)
+
     # All retries failed
     logger.error(f"{description}: ALL strategies failed for URL: {url}")
-    logger.error(f"{description}: Last stderr: {last_stderr}")
-    return False, last_result
+    raise last_error if last_error else DownloadError("extraction failed")
 
 # ==================== ERROR HANDLER ====================
 def error_handler(f):
@@ -433,7 +773,8 @@ def add_cors_headers(response):
     # Don't cache SSE streams
     if response.content_type and 'text/event-stream' in response.content_type:
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    else:
+    elif 'Cache-Control' not in response.headers:
+        # Default only — routes that set their own caching policy win
         response.headers['Cache-Control'] = 'public, max-age=3600'
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'SAMEORIGIN'
@@ -441,9 +782,23 @@ def add_cors_headers(response):
 
 @app.route('/')
 def index():
-    logger.info(f"Homepage requested | IP: {request.remote_addr} | UA: {request.user_agent.string[:80]}")
+    logger.info("Homepage requested | IP: %s | UA: %s", request.remote_addr, request.user_agent.string[:80])
     return render_template('index.html')
 
+def _info_response(payload, video_id):
+    """Wrap a video-info payload with an ETag so repeat loads can 304.
+
+    Video metadata never changes for our purposes, so the video ID is a
+    valid ETag: a client revalidating a video it already loaded gets an
+    empty 304 instead of a full extraction round-trip.
+    """
+    response = jsonify(payload)
+    if video_id:
+        response.set_etag(video_id)
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+
 @app.route('/api/get-video-info', methods=['POST'])
 @error_handler
 def get_video_info():
@@ -459,40 +814,46 @@ def get_video_info():
         logger.warning(f"Invalid YouTube URL rejected: {url}")
         return jsonify({"error": "Invalid YouTube URL"}), 400
     
-    logger.info(f"▶ get_video_info START | URL: {url} | IP: {request.remote_addr}")
-    
+    logger.info("▶ get_video_info START | URL: %s | IP: %s", url, request.remote_addr)
+
+    cache_id = extract_video_id(url)
+    if cache_id and request.if_none_match.contains(cache_id):
+        logger.info("✔ get_video_info 304 | %s", cache_id)
+        response = app.response_class(status=304)
+        response.set_etag(cache_id)
+        response.headers['Cache-Control'] = 'private, max-age=3600'
+        return response
+    if cache_id:
+        cached = _info_cache_get(cache_id)
+        if cached is not None:
+            logger.info("✔ get_video_info CACHE HIT | %s | %ss", cache_id, round(time.time() - req_start, 4))
+            return _info_response(cached, cache_id)
+
     # === ATTEMPT 1: yt-dlp (fastest, best quality info) ===
     ytdlp_failed = False
     try:
-        extra_args = ['--dump-json', '--no-warnings']
-        
-        success, result = run_ytdlp_with_retry(
-            extra_args, url, timeout=60, description="get_video_info"
-        )
-        
-        if success:
-            data = json.loads(result.stdout)
-            duration = int(data.get("duration", 0))
-            title = sanitize_filename(data.get("title", "Video"))
-            uploader = data.get("uploader", "Unknown")
-            
-            if duration > 0:
-                elapsed = round(time.time() - req_start, 2)
-                logger.info(f"✔ get_video_info SUCCESS (yt-dlp) in {elapsed}s | Title: '{title}' | Duration: {duration}s")
-                
-                return jsonify({
-                    "success": True,
-                    "title": title,
-                    "duration": duration,
-                    "thumbnail": data.get("thumbnail", ""),
-                    "uploader": uploader
-                })
-            else:
-                logger.warning(f"yt-dlp returned zero duration, trying Piped fallback")
-                ytdlp_failed = True
+        data = extract_info_with_retry(url, description="get_video_info")
+        duration = int(data.get("duration") or 0)
+        title = sanitize_filename(data.get("title", "Video"))
+        uploader = data.get("uploader", "Unknown")
+
+        if duration > 0:
+            elapsed = round(time.time() - req_start, 2)
+            logger.info("✔ get_video_info SUCCESS (yt-dlp) in %ss | Title: '%s' | Duration: %ss", elapsed, title, duration)
+
+            payload = {
+                "success": True,
+                "title": title,
+                "duration": duration,
+                "thumbnail": data.get("thumbnail", ""),
+                "uploader": uploader
+            }
+            if cache_id:
+                _info_cache_put(cache_id, payload)
+            return _info_response(payload, cache_id)
         else:
+            logger.warning(f"yt-dlp returned zero duration, trying Piped fallback")
             ytdlp_failed = True
-            logger.warning(f"yt-dlp failed for {url}, trying Piped API fallback...")
     except Exception as e:
         ytdlp_failed = True
         logger.warning(f"yt-dlp exception: {e}, trying Piped API fallback...")
@@ -504,7 +865,7 @@ def get_video_info():
             logger.error(f"Could not extract video ID from URL: {url}")
             return jsonify({"error": "Invalid YouTube URL — could not extract video ID"}), 400
         
-        logger.info(f"▶ Piped API fallback for video: {video_id}")
+        logger.info("▶ Piped API fallback for video: %s", video_id)
         piped_data = get_video_info_piped(video_id)
         
         if piped_data and piped_data.get('duration', 0) > 0:
@@ -513,18 +874,24 @@ def get_video_info():
             uploader = piped_data.get('uploader', 'Unknown')
             
             elapsed = round(time.time() - req_start, 2)
-            logger.info(f"✔ get_video_info SUCCESS (Piped) in {elapsed}s | Title: '{title}' | Duration: {duration}s")
+            logger.info("✔ get_video_info SUCCESS (Piped) in %ss | Title: '%s' | Duration: %ss", elapsed, title, duration)
             
-            return jsonify({
+            payload = {
                 "success": True,
                 "title": title,
                 "duration": duration,
                 "thumbnail": piped_data.get('thumbnail', ''),
                 "uploader": uploader,
                 "source": "piped"  # Frontend can use this to know Piped was used
-            })
+            }
+            _info_cache_put(video_id, payload)
+            return _info_response(payload, video_id)
         
-        # Both methods failed
+        # Both methods failed — fall back to a stale cache entry if we have one
+        stale = _info_cache_get(video_id, allow_stale=True)
+        if stale is not None:
+            logger.warning("get_video_info: All extractors failed, serving stale cache entry for %s", video_id)
+            return _info_response(stale, video_id)
         logger.error(f"Both yt-dlp and Piped API failed for URL: {url}")
         return jsonify({"error": "Could not load video. YouTube may be blocking this server. Please try again later."}), 400
     
@@ -541,7 +908,8 @@ def start_trim():
     quality = data.get('quality', 'best')
     filename = sanitize_filename(data.get('filename', 'trimmed_video'))
     
-    logger.info(f"▶ start-trim REQUEST | URL: {url} | Range: {start_time}s-{end_time}s | Quality: {quality} | File: {filename} | IP: {request.remote_addr}")
+    logger.info("▶ start-trim REQUEST | URL: %s | Range: %ss-%ss | Quality: %s | File: %s | IP: %s",
+                url, start_time, end_time, quality, filename, request.remote_addr)
     
     # Validation
     if not url or not is_valid_youtube_url(url):
@@ -559,23 +927,42 @@ def start_trim():
     is_audio = quality == 'audio'
     task_id = str(uuid.uuid4())
     trim_duration = end_time - start_time
+
+    # Collapse duplicate submissions onto the running task
+    dedupe_key = (extract_video_id(url) or url,
+                  round(start_time, 2), round(end_time, 2), quality)
+    with _inflight_lock:
+        existing = _inflight.get(dedupe_key)
+        if existing is not None:
+            with tasks_lock:
+                prior = tasks.get(existing)
+            reusable = prior is not None
+            if reusable:
+                with prior['lock']:
+                    prior_status = prior['status']
+                    prior_file = prior.get('file_path')
+                if prior_status == 'done':
+                    # A finished result is reusable only while its file is
+                    # still on disk (cleanup may have already removed it)
+                    reusable = prior_file is not None and os.path.exists(prior_file)
+            if reusable:
+                logger.info("start-trim DEDUP | Reusing %s task %s for identical request",
+                            prior_status, existing[:8])
+                return jsonify({"task_id": existing})
+            del _inflight[dedupe_key]
+        _inflight[dedupe_key] = task_id
+
+    logger.info("Task %s CREATED | URL: %s | Range: %ss-%ss (%ss) | Quality: %s | Audio: %s",
+                task_id, url, start_time, end_time, trim_duration, quality, is_audio)
     
-    logger.info(f"Task {task_id} CREATED | URL: {url} | Range: {start_time}s-{end_time}s ({trim_duration}s) | Quality: {quality} | Audio: {is_audio}")
-    
-    quality_map = {
-        'best': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best',
-        '1080': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<=1080]+bestaudio/best',
-        '720': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<=720]+bestaudio/best',
-        '480': 'bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<=480]+bestaudio/best',
-        'audio': 'bestaudio[ext=m4a]/bestaudio'
-    }
     
     # Create temp directory (will be cleaned up after download)
-    tmpdir = tempfile.mkdtemp()
+    tmpdir = tempfile.mkdtemp(dir=TEMP_DIR)
     file_ext = 'mp3' if is_audio else 'mp4'
     output_path = os.path.join(tmpdir, f"{filename}.{file_ext}")
     
     # Initialize task state
+    task_lock = threading.Lock()
     with tasks_lock:
         tasks[task_id] = {
             'status': 'starting',
@@ -584,7 +971,7 @@ def start_trim():
             'eta': '',
             'size': '',
             'downloaded': '',
-            'phase': 'Starting download...',
+            'phase': 'Queued...',
             'error': None,
             'file_path': None,
             'file_name': None,
@@ -593,8 +980,14 @@ def start_trim():
             'filename': filename,
             'is_audio': is_audio,
             'created_at': time.time(),
+            'dedupe_key': dedupe_key,
+            'version': 0,
+            'removed': False,
+            'lock': task_lock,
+            'cond': threading.Condition(task_lock),
         }
-    logger.info(f"Task {task_id}: State initialized | Temp dir: {tmpdir} | Output: {output_path}")
+    _cleanup_wakeup.set()  # Let the janitor re-derive its next deadline
+    logger.info("Task %s: State initialized | Temp dir: %s | Output: %s", task_id, tmpdir, output_path)
     
     def run_ytdlp():
         try:
@@ -602,19 +995,25 @@ def start_trim():
             last_log_pct = -10  # For pip-style log throttling
             tid = task_id[:8]  # Short ID for compact logs
             
-            logger.info(f"[{tid}] ▶ TRIM START | {quality} | {start_time}s→{end_time}s ({trim_duration}s) | {url}")
+            logger.info("[%s] ▶ TRIM START | %s | %ss→%ss (%ss) | %s",
+                        tid, quality, start_time, end_time, trim_duration, url)
             
-            with tasks_lock:
-                tasks[task_id]['status'] = 'downloading'
-                tasks[task_id]['phase'] = 'Preparing download...'
+            _set_task(task_id, status='downloading', phase='Preparing download...')
             
             # Build base trim args (without player_client — added per retry)
             base_extra_args = [
-                '-f', quality_map.get(quality, quality_map['best']),
+                '-f', QUALITY_FORMATS.get(quality, QUALITY_FORMATS['best']),
+                # Section download drives ffmpeg with an input-side seek, so
+                # only the requested range is fetched. Deliberately no
+                # --force-keyframes-at-cuts: it would re-encode at the cut
+                # points, trading a full transcode pass for frame accuracy.
                 '--download-sections', f'*{start_time}-{end_time}',
                 '--fragment-retries', '5',
                 '--retries', '5',
-                '--buffer-size', '16K',
+                # 1M buffer cuts syscalls per MB ~64x vs 16K; 10M HTTP chunks
+                # reduce request count on progressive formats
+                '--buffer-size', '1M',
+                '--http-chunk-size', HTTP_CHUNK_SIZE,
                 '--no-warnings',
                 '--newline',
                 '--progress-template', '%(progress._percent_str)s|%(progress._speed_str)s|%(progress._eta_str)s|%(progress._total_bytes_str)s|%(progress._downloaded_bytes_str)s',
@@ -630,6 +1029,10 @@ def start_trim():
                 ])
             else:
                 base_extra_args.extend([
+                    # Short clips span few fragments; high fan-out just adds
+                    # connection setup. Audio stays single-stream (no flag).
+                    '--concurrent-fragments',
+                    str(min(4, CONCURRENT_FRAGMENTS)) if trim_duration < 30 else str(CONCURRENT_FRAGMENTS),
                     '--merge-output-format', 'mp4',
                     '--postprocessor-args', 'ffmpeg:-c copy -movflags +faststart',
                     '-o', output_path,
@@ -637,29 +1040,31 @@ def start_trim():
             
             base_extra_args.append(url)
             
-            # Try each player client strategy until one works
+            # Try each player client strategy until one works, best scorer first
             process = None
-            for strategy_idx, client in enumerate(PLAYER_CLIENT_STRATEGIES):
+            strategies = _ordered_clients()
+            for strategy_idx, client in enumerate(strategies):
                 client_name = client or 'default'
                 cmd = get_ytdlp_base_args(player_client=client) + base_extra_args
                 
                 if strategy_idx == 0:
-                    logger.info(f"[{tid}] Trying player_client={client_name}")
+                    logger.info("[%s] Trying player_client=%s", tid, client_name)
                 else:
-                    logger.info(f"[{tid}] Retry #{strategy_idx} with player_client={client_name}")
-                    with tasks_lock:
-                        tasks[task_id]['phase'] = f'Retrying (attempt {strategy_idx + 1})...'
-                        tasks[task_id]['progress'] = 0
+                    logger.info("[%s] Retry #%d with player_client=%s", tid, strategy_idx, client_name)
+                    _set_task(task_id, phase=f'Retrying (attempt {strategy_idx + 1})...', progress=0)
                     last_log_pct = -10
+
+                # Guard the join — only pay for it when the record will be emitted
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("[%s] CMD: %s ... %s", tid, ' '.join(cmd[:6]), cmd[-1])
                 
-                logger.info(f"[{tid}] CMD: {' '.join(cmd[:6])} ... {cmd[-1]}")
-                
-                with tasks_lock:
-                    tasks[task_id]['status'] = 'downloading'
-                    if strategy_idx == 0:
-                        tasks[task_id]['phase'] = 'Downloading...'
+                if strategy_idx == 0:
+                    _set_task(task_id, status='downloading', phase='Downloading...')
+                else:
+                    _set_task(task_id, status='downloading')
                 
-                # Use binary mode + unbuffered to catch \r-separated ffmpeg progress
+                # bufsize=0 keeps stdout a raw pipe, so read(4096) returns
+                # whatever is available instead of blocking for a full block
                 process = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
@@ -669,122 +1074,146 @@ def start_trim():
                 
                 # Collect all output to check for errors
                 all_output_lines = []
-            
-                # Read byte-by-byte to handle both \r and \n separators
-                # (ffmpeg uses \r for in-place progress, yt-dlp uses \n)
+
+                # Progress lines can arrive hundreds of times per second;
+                # coalesce them and publish at most ~10 Hz so each tick is
+                # one lock acquisition and one SSE wakeup.
+                pending = {}
+                last_emit = 0.0
+
+                # Read 4KB chunks and split on \r or \n ourselves: ffmpeg
+                # emits \r-separated in-place progress, yt-dlp \n-separated
+                # lines, and a byte-per-read loop costs one syscall per byte
                 buf = b''
                 while True:
-                    byte = process.stdout.read(1)
-                    if not byte:
-                        break
-                    if byte in (b'\r', b'\n'):
-                        if buf:
-                            line = buf.decode('utf-8', errors='replace').strip()
-                            buf = b''
-                            if not line:
-                                continue
-                            
-                            all_output_lines.append(line)
-                            
-                            # --- Parse yt-dlp progress-template output ---
-                            if '|' in line and '%' in line:
-                                parts = line.split('|')
-                                if len(parts) >= 5:
-                                    try:
-                                        pct = float(parts[0].strip().replace('%', ''))
-                                        speed = parts[1].strip() if parts[1].strip() != 'NA' else ''
-                                        eta = parts[2].strip() if parts[2].strip() != 'NA' else ''
-                                        total_size = parts[3].strip() if parts[3].strip() != 'NA' else ''
-                                        downloaded = parts[4].strip() if parts[4].strip() != 'NA' else ''
-                                        with tasks_lock:
-                                            tasks[task_id]['progress'] = min(pct, 100)
-                                            tasks[task_id]['speed'] = speed
-                                            tasks[task_id]['eta'] = eta
-                                            tasks[task_id]['size'] = total_size
-                                            tasks[task_id]['downloaded'] = downloaded
-                                        # Pip-style log every 10%
-                                        if pct >= last_log_pct + 10 or pct >= 100:
-                                            bar = _progress_bar(pct)
-                                            logger.info(f"[{tid}] {bar} {pct:5.1f}% | {speed or '-':>10} | ETA {eta or '-':>6} | {downloaded or '-'}/{total_size or '-'}")
-                                            last_log_pct = pct
-                                    except (ValueError, IndexError):
-                                        pass
-                            
-                            # --- Parse ffmpeg time= output (main progress source for --download-sections) ---
-                            elif 'time=' in line and 'speed=' in line:
-                                time_match = re.search(r'time=(\d+):(\d+):(\d+\.?\d*)', line)
-                                speed_match = re.search(r'speed=\s*(\S+)', line)
-                                size_match = re.search(r'size=\s*(\S+)', line)
-                                if time_match and trim_duration > 0:
-                                    t_h, t_m, t_s = int(time_match.group(1)), int(time_match.group(2)), float(time_match.group(3))
-                                    current_sec = t_h * 3600 + t_m * 60 + t_s
-                                    pct = min((current_sec / trim_duration) * 90, 90)  # Cap at 90%, post-processing takes 90-100
-                                    ffmpeg_speed = speed_match.group(1) if speed_match else ''
-                                    ffmpeg_size = size_match.group(1) if size_match else ''
-                                    remaining = trim_duration - current_sec
-                                    with tasks_lock:
-                                        tasks[task_id]['progress'] = pct
-                                        tasks[task_id]['speed'] = ffmpeg_speed
-                                        tasks[task_id]['eta'] = f'{remaining:.0f}s' if remaining > 0 else '0s'
-                                        tasks[task_id]['size'] = ffmpeg_size
-                                        tasks[task_id]['phase'] = f'Processing... {pct:.0f}%'
+                    chunk = process.stdout.read(4096)
+                    at_eof = not chunk
+                    if at_eof:
+                        complete, buf = ([buf] if buf else []), b''
+                    else:
+                        *complete, buf = (buf + chunk).replace(b'\r', b'\n').split(b'\n')
+                    for raw in complete:
+                        line = raw.decode('utf-8', errors='replace').strip()
+                        if not line:
+                            continue
+                        
+                        all_output_lines.append(line)
+                        
+                        # --- Parse yt-dlp progress-template output ---
+                        # Template lines always start with the percent digit,
+                        # so a one-char check skips the substring scans for
+                        # the (far more frequent) ffmpeg status lines
+                        if line[:1].isdigit() and '|' in line and '%' in line:
+                            # Strip and NA-normalize each field exactly once
+                            parts = ['' if p == 'NA' else p
+                                     for p in (p.strip() for p in line.split('|', 4))]
+                            if len(parts) == 5:
+                                pct_s, speed, eta, total_size, downloaded = parts
+                                try:
+                                    pct = float(pct_s.rstrip('%'))
+                                    pending.update(
+                                        progress=min(pct, 100),
+                                        speed=speed,
+                                        eta=eta,
+                                        size=total_size,
+                                        downloaded=downloaded,
+                                    )
                                     # Pip-style log every 10%
-                                    if pct >= last_log_pct + 10:
-                                        bar = _progress_bar(pct)
-                                        logger.info(f"[{tid}] {bar} {pct:5.1f}% | {ffmpeg_speed:>10} | ~{remaining:.0f}s left | {ffmpeg_size}")
+                                    if pct >= last_log_pct + 10 or pct >= 100:
+                                        # %s-style defers formatting to the handler
+                                        logger.info("[%s] %s %5.1f%% | %10s | ETA %6s | %s/%s",
+                                                    tid, _progress_bar(pct), pct, speed or '-',
+                                                    eta or '-', downloaded or '-', total_size or '-')
                                         last_log_pct = pct
-                            
-                            # --- Parse [download] fallback ---
-                            elif '[download]' in line and '%' in line:
-                                match = re.search(r'(\d+\.?\d*)%', line)
-                                if match:
-                                    pct = float(match.group(1))
-                                    with tasks_lock:
-                                        tasks[task_id]['progress'] = min(pct, 100)
-                            
-                            # --- Detect post-processing ---
-                            elif '[Merger]' in line or '[ExtractAudio]' in line or '[ffmpeg]' in line:
-                                logger.info(f"[{tid}] ⚙ Post-processing...")
-                                with tasks_lock:
-                                    tasks[task_id]['phase'] = 'Merging & processing...'
-                                    tasks[task_id]['progress'] = 95
-                            
-                            # --- Log important yt-dlp info lines (not progress noise) ---
-                            elif line.startswith('[') and 'download' not in line.lower():
-                                logger.info(f"[{tid}] {line}")
-                    else:
-                        buf += byte
+                                except (ValueError, IndexError):
+                                    pass
+                        
+                        # --- Parse ffmpeg time= output (main progress source for --download-sections) ---
+                        elif 'time=' in line and 'speed=' in line:
+                            time_match = _FFMPEG_TIME_RE.search(line)
+                            speed_match = _FFMPEG_SPEED_RE.search(line)
+                            size_match = _FFMPEG_SIZE_RE.search(line)
+                            if time_match and trim_duration > 0:
+                                t_h, t_m, t_s = int(time_match.group(1)), int(time_match.group(2)), float(time_match.group(3))
+                                current_sec = t_h * 3600 + t_m * 60 + t_s
+                                pct = min((current_sec / trim_duration) * 90, 90)  # Cap at 90%, post-processing takes 90-100
+                                ffmpeg_speed = speed_match.group(1) if speed_match else ''
+                                ffmpeg_size = size_match.group(1) if size_match else ''
+                                remaining = trim_duration - current_sec
+                                pending.update(
+                                    progress=pct,
+                                    speed=ffmpeg_speed,
+                                    eta=f'{remaining:.0f}s' if remaining > 0 else '0s',
+                                    size=ffmpeg_size,
+                                    phase=f'Processing... {pct:.0f}%',
+                                )
+                                # Pip-style log every 10%
+                                if pct >= last_log_pct + 10:
+                                    logger.info("[%s] %s %5.1f%% | %10s | ~%.0fs left | %s",
+                                                tid, _progress_bar(pct), pct,
+                                                ffmpeg_speed, remaining, ffmpeg_size)
+                                    last_log_pct = pct
+                        
+                        # --- Parse [download] fallback ---
+                        elif '[download]' in line and '%' in line:
+                            match = _DOWNLOAD_PCT_RE.search(line)
+                            if match:
+                                pct = float(match.group(1))
+                                pending['progress'] = min(pct, 100)
+                        
+                        # --- Detect post-processing ---
+                        elif '[Merger]' in line or '[ExtractAudio]' in line or '[ffmpeg]' in line:
+                            logger.info("[%s] ⚙ Post-processing...", tid)
+                            # Phase transition: flush immediately
+                            pending.clear()
+                            _set_task(task_id, phase='Merging & processing...', progress=95)
+                            last_emit = time.monotonic()
+                        
+                        # --- Log important yt-dlp info lines (not progress noise) ---
+                        elif line.startswith('[') and 'download' not in line.lower():
+                            logger.info("[%s] %s", tid, line)
+
+                        # Publish coalesced progress at most every 100ms
+                        now = time.monotonic()
+                        if pending and now - last_emit >= 0.1:
+                            _set_task(task_id, **pending)
+                            pending.clear()
+                            last_emit = now
+                    if at_eof:
+                        break
                 
                 process.wait()
+
+                # Flush whatever progress was still pending when output ended
+                if pending:
+                    _set_task(task_id, **pending)
+                    pending.clear()
+
                 dl_elapsed = round(time.time() - dl_start_time, 2)
                 
                 if process.returncode != 0:
                     # Check if this is a retriable error (bot detection / format issue)
                     all_output = ' '.join(all_output_lines).lower()
-                    is_retriable = any(kw in all_output for kw in [
-                        'sign in', 'bot', 'confirm', 'cookies', 'authentication',
-                        'requested format', 'not available', 'format is not',
-                        'no video formats', 'unavailable',
-                    ])
+                    is_retriable = _RETRIABLE_ERR_RE.search(all_output) is not None
                     
-                    if is_retriable and strategy_idx < len(PLAYER_CLIENT_STRATEGIES) - 1:
+                    if is_retriable and strategy_idx < len(strategies) - 1:
+                        _record_client_result(client, False)
+                        delay = _retry_delay(strategy_idx)
                         logger.warning(f"[{tid}] ✘ player_client={client_name} failed (retriable) | exit={process.returncode} | {dl_elapsed:.1f}s")
-                        logger.info(f"[{tid}] Waiting 2s before trying next client...")
+                        logger.info("[%s] Backing off %.2fs before trying next client...", tid, delay)
                         # Clean any partial files before retry
                         for f in os.listdir(tmpdir):
                             fpath = os.path.join(tmpdir, f)
                             if os.path.isfile(fpath):
                                 os.remove(fpath)
-                        time.sleep(2)
+                        time.sleep(delay)
                         continue  # Try next player client
                     
                     logger.error(f"[{tid}] ✘ yt-dlp FAILED with all strategies | exit={process.returncode} | {dl_elapsed}s")
                     
                     # === PIPED API FALLBACK ===
-                    logger.info(f"[{tid}] 🔄 Trying Piped API fallback for trim...")
-                    with tasks_lock:
-                        tasks[task_id]['phase'] = 'Switching to backup method...'
-                        tasks[task_id]['progress'] = 0
+                    logger.info("[%s] 🔄 Trying Piped API fallback for trim...", tid)
+                    _set_task(task_id, phase='Switching to backup method...', progress=0)
                     
                     video_id = extract_video_id(url)
                     if video_id:
@@ -793,9 +1222,7 @@ def start_trim():
                             video_url, audio_url = get_best_stream_urls(piped_data, quality=quality, audio_only=is_audio)
                             
                             if video_url or audio_url:
-                                with tasks_lock:
-                                    tasks[task_id]['phase'] = 'Downloading via backup...'
-                                    tasks[task_id]['progress'] = 10
+                                _set_task(task_id, phase='Downloading via backup...', progress=10)
                                 
                                 # Clean any partial files
                                 for f in os.listdir(tmpdir):
@@ -809,10 +1236,8 @@ def start_trim():
                                 )
                                 
                                 if piped_success:
-                                    logger.info(f"[{tid}] ✔ Piped fallback SUCCEEDED!")
-                                    with tasks_lock:
-                                        tasks[task_id]['progress'] = 95
-                                        tasks[task_id]['phase'] = 'Finalizing...'
+                                    logger.info("[%s] ✔ Piped fallback SUCCEEDED!", tid)
+                                    _set_task(task_id, progress=95, phase='Finalizing...')
                                     # Don't return error — let it continue to file detection below
                                     break  # Exit retry loop, proceed to file detection
                                 else:
@@ -825,32 +1250,22 @@ def start_trim():
                         logger.error(f"[{tid}] ✘ Could not extract video ID from URL")
                     
                     # Everything truly failed
-                    with tasks_lock:
-                        tasks[task_id]['status'] = 'error'
-                        tasks[task_id]['error'] = 'Failed to trim video. All methods exhausted.'
+                    _set_task(task_id, status='error',
+                              error='Failed to trim video. All methods exhausted.')
                     return
                 
                 # Success! Break out of retry loop
-                logger.info(f"[{tid}] ✔ player_client={client_name} succeeded")
+                logger.info("[%s] ✔ player_client=%s succeeded", tid, client_name)
+                _record_client_result(client, True)
                 break
             
             # Find the actual output file
-            # Check exact output_path first (Piped/ffmpeg writes here), then scan dir (yt-dlp may rename)
-            actual_file = None
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                actual_file = output_path
-            else:
-                for f in os.listdir(tmpdir):
-                    if f.startswith(filename):
-                        actual_file = os.path.join(tmpdir, f)
-                        break
-            
-            if not actual_file or not os.path.exists(actual_file):
+            actual_file = find_output_file(tmpdir, filename, output_path)
+
+            if not actual_file:
                 dir_contents = os.listdir(tmpdir) if os.path.exists(tmpdir) else []
                 logger.error(f"Task {task_id}: Output file not found! Expected prefix: '{filename}' | Dir contents: {dir_contents}")
-                with tasks_lock:
-                    tasks[task_id]['status'] = 'error'
-                    tasks[task_id]['error'] = 'Failed to create output file'
+                _set_task(task_id, status='error', error='Failed to create output file')
                 return
             
             if is_audio:
@@ -862,28 +1277,43 @@ def start_trim():
             
             file_size = os.path.getsize(actual_file)
             total_elapsed = round(time.time() - dl_start_time, 2)
-            logger.info(f"[{tid}] ✔ DONE | {dl_name} | {file_size / (1024*1024):.2f} MB | {total_elapsed}s")
+            logger.info("[%s] ✔ DONE | %s | %.2f MB | %ss", tid, dl_name, file_size / (1024*1024), total_elapsed)
             
-            with tasks_lock:
-                tasks[task_id]['status'] = 'done'
-                tasks[task_id]['progress'] = 100
-                tasks[task_id]['phase'] = 'Complete!'
-                tasks[task_id]['file_path'] = actual_file
-                tasks[task_id]['file_name'] = dl_name
-                tasks[task_id]['mimetype'] = mimetype
-                tasks[task_id]['file_size'] = file_size
-        
+            _set_task(
+                task_id,
+                status='done',
+                progress=100,
+                phase='Complete!',
+                file_path=actual_file,
+                file_name=dl_name,
+                mimetype=mimetype,
+                file_size=file_size,
+            )
+
         except Exception as e:
             logger.error(f"[{tid}] ✘ EXCEPTION: {type(e).__name__}: {e}")
             logger.error(traceback.format_exc())
+            _set_task(task_id, status='error', error=str(e))
+        finally:
+            # On failure, stop deduping onto this task so retries start
+            # fresh. On success the mapping stays: identical requests get
+            # the finished file back instantly until the task is cleaned
+            # up (_drop_task purges the mapping alongside the task).
             with tasks_lock:
-                tasks[task_id]['status'] = 'error'
-                tasks[task_id]['error'] = str(e)
-    
-    # Start background thread
-    thread = threading.Thread(target=run_ytdlp, daemon=True)
-    thread.start()
-    logger.info(f"[{task_id[:8]}] Thread started")
+                current = tasks.get(task_id)
+            if current is not None:
+                with current['lock']:
+                    succeeded = current['status'] == 'done'
+            else:
+                succeeded = False
+            if not succeeded:
+                with _inflight_lock:
+                    if _inflight.get(dedupe_key) == task_id:
+                        del _inflight[dedupe_key]
+
+    # Queue on the bounded worker pool
+    _executor.submit(run_ytdlp)
+    logger.info("[%s] Submitted to worker pool (max %d concurrent)", task_id[:8], MAX_JOBS)
     
     return jsonify({"task_id": task_id})
 
@@ -891,19 +1321,37 @@ def start_trim():
 @app.route('/api/progress/<task_id>')
 def progress(task_id):
     """SSE endpoint for real-time progress updates"""
-    logger.info(f"SSE: Stream opened | {task_id[:8]}")
+    logger.info("SSE: Stream opened | %s", task_id[:8])
     sse_start = time.time()
-    sse_last_log = -20
     def generate():
-        nonlocal sse_last_log
+        # Event-driven: wait on the task's condition and only serialize when
+        # its version changed; a heartbeat comment keeps the connection alive.
+        last_version = -1
         while True:
             with tasks_lock:
-                task = tasks.get(task_id)
-            
-            if not task:
-                yield f"data: {json.dumps({'status': 'error', 'error': 'Task not found'})}\n\n"
+                current = tasks.get(task_id)
+            if current is None:
+                yield f"data: {jdumps({'status': 'error', 'error': 'Task not found'})}\n\n"
                 break
-            
+
+            task = None
+            with current['lock']:
+                changed = current['cond'].wait_for(
+                    lambda: current['version'] != last_version,
+                    timeout=15,
+                )
+                if changed:
+                    last_version = current['version']
+                    task = dict(current)
+
+            if task is None:
+                yield ": heartbeat\n\n"
+                continue
+
+            if task.get('removed'):
+                yield f"data: {jdumps({'status': 'error', 'error': 'Task not found'})}\n\n"
+                break
+
             event_data = {
                 'status': task['status'],
                 'progress': task['progress'],
@@ -913,22 +1361,21 @@ def progress(task_id):
                 'downloaded': task['downloaded'],
                 'phase': task['phase'],
             }
-            
+
             if task['status'] == 'done':
                 event_data['file_size'] = task.get('file_size', 0)
                 event_data['file_name'] = task.get('file_name', '')
-                logger.info(f"SSE: ✔ Done | {task_id[:8]} | {round(time.time()-sse_start,1)}s")
-                yield f"data: {json.dumps(event_data)}\n\n"
+                logger.info("SSE: ✔ Done | %s | %ss", task_id[:8], round(time.time() - sse_start, 1))
+                yield f"data: {jdumps(event_data)}\n\n"
                 break
-            
+
             if task['status'] == 'error':
                 event_data['error'] = task.get('error', 'Unknown error')
                 logger.error(f"SSE: ✘ Error | {task_id[:8]} | {event_data['error']}")
-                yield f"data: {json.dumps(event_data)}\n\n"
+                yield f"data: {jdumps(event_data)}\n\n"
                 break
-            
-            yield f"data: {json.dumps(event_data)}\n\n"
-            time.sleep(0.5)
+
+            yield f"data: {jdumps(event_data)}\n\n"
     
     return Response(
         generate(),
@@ -944,7 +1391,7 @@ def progress(task_id):
 @app.route('/api/download/<task_id>')
 def download_file(task_id):
     """Download the completed file"""
-    logger.info(f"▶ DOWNLOAD REQUEST | {task_id[:8]}")
+    logger.info("▶ DOWNLOAD REQUEST | %s", task_id[:8])
     
     with tasks_lock:
         task = tasks.get(task_id)
@@ -963,42 +1410,57 @@ def download_file(task_id):
         return jsonify({"error": "File not found"}), 404
     
     file_size = os.path.getsize(file_path)
-    logger.info(f"Download: Serving {task['file_name']} | {file_size / (1024*1024):.2f} MB")
+    logger.info("Download: Serving %s | %.2f MB", task['file_name'], file_size / (1024*1024))
     
+    # conditional=True enables HTTP Range/If-Range handling and hands the
+    # response to the WSGI server's file wrapper, which serves the file via
+    # sendfile(2) instead of chunking every byte through Python.
     return send_file(
         file_path,
         mimetype=task['mimetype'],
         as_attachment=True,
-        download_name=task['file_name']
+        download_name=task['file_name'],
+        conditional=True
     )
 
 
 @app.route('/api/cleanup/<task_id>', methods=['POST'])
 def cleanup_task(task_id):
     """Clean up task files after download"""
-    logger.info(f"Cleanup requested for task {task_id}")
+    logger.info("Cleanup requested for task %s", task_id)
     
+    task = _drop_task(task_id)
     with tasks_lock:
-        task = tasks.pop(task_id, None)
         active_count = len(tasks)
-    
+
     if task and task.get('tmpdir') and os.path.exists(task['tmpdir']):
-        try:
-            tmpdir_size = sum(
-                os.path.getsize(os.path.join(dp, f))
-                for dp, dn, filenames in os.walk(task['tmpdir'])
-                for f in filenames
-            )
-            shutil.rmtree(task['tmpdir'])
-            logger.info(f"Cleaned up task {task_id} | Freed: {tmpdir_size / (1024*1024):.2f} MB | Active tasks remaining: {active_count}")
-        except Exception as e:
-            logger.error(f"Cleanup failed for task {task_id}: {type(e).__name__}: {e}")
+        _cleanup_pool.submit(_remove_tmpdir, task_id, task['tmpdir'], active_count)
     else:
-        logger.info(f"Cleanup: No temp dir to remove for task {task_id} | Active tasks: {active_count}")
-    
+        logger.info("Cleanup: No temp dir to remove for task %s | Active tasks: %d", task_id, active_count)
+
     return jsonify({"ok": True})
 
 
+def _remove_tmpdir(task_id, tmpdir, active_count):
+    """Delete a task's tmpdir and log the space freed (runs off-request)."""
+    try:
+        tmpdir_size = _rmtree_with_size(tmpdir)
+        logger.info("Cleaned up task %s | Freed: %.2f MB | Active tasks remaining: %d",
+                    task_id, tmpdir_size / (1024*1024), active_count)
+    except Exception as e:
+        logger.error(f"Cleanup failed for task {task_id}: {type(e).__name__}: {e}")
+
+
+@app.route('/api/cache/clear', methods=['POST'])
+def clear_info_cache():
+    """Drop all cached video info entries"""
+    with _info_cache_lock:
+        count = len(_info_cache)
+        _info_cache.clear()
+    logger.info(f"Info cache cleared | {count} entries dropped")
+    return jsonify({"ok": True, "cleared": count})
+
+
 # Keep the old endpoint for backward compatibility
 @app.route('/api/trim-video', methods=['POST'])
 @error_handler
@@ -1023,28 +1485,23 @@ def trim_video():
     
     is_audio = quality == 'audio'
     
-    logger.info(f"Legacy trim-video | URL: {url} | Range: {start_time}s-{end_time}s | Quality: {quality} | File: {filename} | IP: {request.remote_addr}")
+    logger.info("Legacy trim-video | URL: %s | Range: %ss-%ss | Quality: %s | File: %s | IP: %s",
+                url, start_time, end_time, quality, filename, request.remote_addr)
     
-    quality_map = {
-        'best': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best',
-        '1080': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<=1080]+bestaudio/best',
-        '720': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<=720]+bestaudio/best',
-        '480': 'bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/bestvideo[height<=480]+bestaudio/best',
-        'audio': 'bestaudio[ext=m4a]/bestaudio'
-    }
     
     try:
-        with tempfile.TemporaryDirectory() as tmpdir:
+        with tempfile.TemporaryDirectory(dir=TEMP_DIR) as tmpdir:
             file_ext = 'mp3' if is_audio else 'mp4'
             output_path = os.path.join(tmpdir, f"{filename}.{file_ext}")
             
             cmd = get_ytdlp_base_args(player_client='web_creator') + [
-                '-f', quality_map.get(quality, quality_map['best']),
+                '-f', QUALITY_FORMATS.get(quality, QUALITY_FORMATS['best']),
                 '--download-sections', f'*{start_time}-{end_time}',
-                '--concurrent-fragments', '16',
+                '--concurrent-fragments', str(CONCURRENT_FRAGMENTS),
                 '--fragment-retries', '5',
                 '--retries', '5',
-                '--buffer-size', '16K',
+                '--buffer-size', '1M',
+                '--http-chunk-size', HTTP_CHUNK_SIZE,
                 '--no-warnings',
             ]
             
@@ -1065,26 +1522,42 @@ def trim_video():
             
             cmd.append(url)
             
-            logger.info(f"Legacy trim: Executing yt-dlp command: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-            
-            if result.returncode != 0:
-                logger.error(f"Legacy trim yt-dlp FAILED | Exit code: {result.returncode}")
-                logger.error(f"Legacy trim yt-dlp stderr: {result.stderr}")
-                logger.error(f"Legacy trim yt-dlp stdout: {result.stdout[:500] if result.stdout else 'empty'}")
-                error_msg = result.stderr.lower()
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Legacy trim: Executing yt-dlp command: %s", ' '.join(cmd))
+            # Keep only a bounded stderr tail instead of buffering the whole
+            # chatty download log in memory; stdout is never used on success.
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            stderr_tail = deque(maxlen=200)
+            drain = threading.Thread(
+                target=lambda: stderr_tail.extend(process.stderr), daemon=True
+            )
+            drain.start()
+            try:
+                returncode = process.wait(timeout=600)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                raise
+            drain.join(timeout=5)
+
+            if returncode != 0:
+                stderr_text = ''.join(stderr_tail)
+                logger.error(f"Legacy trim yt-dlp FAILED | Exit code: {returncode}")
+                logger.error(f"Legacy trim yt-dlp stderr (tail): {stderr_text}")
+                error_msg = stderr_text.lower()
                 if 'not available' in error_msg or 'unavailable' in error_msg:
                     return jsonify({"error": "Video not available in your region"}), 400
                 return jsonify({"error": "Failed to trim video. Check video availability."}), 400
             
             # yt-dlp may change the extension, find the actual output file
-            actual_file = None
-            for f in os.listdir(tmpdir):
-                if f.startswith(filename):
-                    actual_file = os.path.join(tmpdir, f)
-                    break
-            
-            if not actual_file or not os.path.exists(actual_file):
+            actual_file = find_output_file(tmpdir, filename, output_path)
+
+            if not actual_file:
                 dir_contents = os.listdir(tmpdir) if os.path.exists(tmpdir) else []
                 logger.error(f"Legacy trim: Output file not found! Expected prefix: '{filename}' | Dir contents: {dir_contents}")
                 return jsonify({"error": "Failed to create output file"}), 500
@@ -1099,7 +1572,7 @@ def trim_video():
                 dl_name = f"{filename}.mp4"
             
             file_size = os.path.getsize(actual_file)
-            logger.info(f"File ready. Size: {file_size / (1024*1024):.2f} MB | Type: {mimetype}")
+            logger.info("File ready. Size: %.2f MB | Type: %s", file_size / (1024*1024), mimetype)
             
             return send_file(
                 actual_file,
@@ -1119,27 +1592,48 @@ def trim_video():
         logger.error(traceback.format_exc())
         return jsonify({"error": "Failed to process video"}), 500
 
+# Load balancers and uptime monitors can hit /api/health several times a
+# minute; cache the subprocess probes so fork+exec happens at most once per
+# TTL regardless of probe frequency.
+_HEALTH_PROBE_TTL = 30
+_health_probe_cache = {'t': 0.0, 'result': None}
+_health_probe_lock = threading.Lock()
+
+
+def _probe_tools():
+    """Run (or reuse) the yt-dlp/ffmpeg availability probes."""
+    with _health_probe_lock:
+        cached = _health_probe_cache['result']
+        if cached is not None and time.monotonic() - _health_probe_cache['t'] < _HEALTH_PROBE_TTL:
+            return cached
+
+        ytdlp_ok = False
+        ytdlp_version = 'unknown'
+        try:
+            r = subprocess.run([YTDLP_BIN, '--version'], capture_output=True, text=True, timeout=10)
+            ytdlp_ok = r.returncode == 0
+            ytdlp_version = r.stdout.strip() if r.stdout else 'unknown'
+        except Exception as e:
+            logger.error(f"Health check: yt-dlp failed: {e}")
+
+        ffmpeg_ok = False
+        try:
+            r = subprocess.run([FFMPEG_BIN, '-version'], capture_output=True, text=True, timeout=10)
+            ffmpeg_ok = r.returncode == 0
+        except Exception as e:
+            logger.error(f"Health check: ffmpeg failed: {e}")
+
+        result = (ytdlp_ok, ytdlp_version, ffmpeg_ok)
+        _health_probe_cache['result'] = result
+        _health_probe_cache['t'] = time.monotonic()
+        return result
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint with diagnostics"""
-    # Check yt-dlp
-    ytdlp_ok = False
-    ytdlp_version = 'unknown'
-    try:
-        r = subprocess.run(['yt-dlp', '--version'], capture_output=True, text=True, timeout=10)
-        ytdlp_ok = r.returncode == 0
-        ytdlp_version = r.stdout.strip() if r.stdout else 'unknown'
-    except Exception as e:
-        logger.error(f"Health check: yt-dlp failed: {e}")
-    
-    # Check ffmpeg
-    ffmpeg_ok = False
-    try:
-        r = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True, timeout=10)
-        ffmpeg_ok = r.returncode == 0
-    except Exception as e:
-        logger.error(f"Health check: ffmpeg failed: {e}")
-    
+    ytdlp_ok, ytdlp_version, ffmpeg_ok = _probe_tools()
+
     # Check disk space
     try:
         stat = shutil.disk_usage(TEMP_DIR)
@@ -1164,42 +1658,74 @@ def health():
         "timestamp": datetime.now().isoformat()
     }
     
-    logger.info(f"Health check | Status: {status} | yt-dlp: {ytdlp_version} | POT: {POT_PROVIDER_AVAILABLE} | Node.js: {NODE_AVAILABLE} | Disk free: {disk_free_mb:.0f} MB | Active tasks: {active_tasks}")
+    logger.info("Health check | Status: %s | yt-dlp: %s | POT: %s | Node.js: %s | Disk free: %.0f MB | Active tasks: %d",
+                status, ytdlp_version, POT_PROVIDER_AVAILABLE, NODE_AVAILABLE, disk_free_mb, active_tasks)
     
     return jsonify(health_data), 200 if status == 'ok' else 503
 
 
 # ==================== PERIODIC CLEANUP ====================
 def periodic_cleanup():
-    """Clean up stale tasks older than 30 minutes"""
+    """Clean up stale tasks: finished ones after 15 minutes, any after 30.
+
+    Clients that disconnect without POSTing /api/cleanup would otherwise
+    leak their tasks entry and tmpdir forever.
+    """
     while True:
-        time.sleep(300)  # Every 5 minutes
+        # Sleep until roughly the next eviction deadline instead of a fixed
+        # cadence: an idle store waits the full 10 minutes between wakeups,
+        # while pending evictions are honored within a minute. Task creation
+        # sets the event so a long idle wait re-computes its deadline.
+        now = time.time()
+        with tasks_lock:
+            next_deadline = min(
+                (t.get('created_at', now)
+                 + (900 if t.get('status') in ('done', 'error') else 1800)
+                 for t in tasks.values()),
+                default=now + 600,
+            )
+        _cleanup_wakeup.wait(max(60, min(600, next_deadline - now)))
+        _cleanup_wakeup.clear()
         try:
             now = time.time()
-            stale_ids = []
+            stale = []
+            # One critical section: pop stale entries while scanning instead
+            # of re-acquiring the lock once per id afterwards
             with tasks_lock:
-                for tid, task in tasks.items():
-                    created = task.get('created_at', now)
-                    if now - created > 1800:  # 30 minutes
-                        stale_ids.append(tid)
-            
-            for tid in stale_ids:
-                with tasks_lock:
-                    task = tasks.pop(tid, None)
-                if task and task.get('tmpdir') and os.path.exists(task['tmpdir']):
+                for tid in list(tasks):
+                    task = tasks[tid]
+                    age = now - task.get('created_at', now)
+                    if task.get('status') in ('done', 'error'):
+                        if age > 900:  # 15 minutes after finishing states
+                            stale.append((tid, tasks.pop(tid)))
+                    elif age > 1800:  # 30 minutes for anything still running
+                        stale.append((tid, tasks.pop(tid)))
+                # Hard cap so a burst of abandoned tasks can't grow the
+                # dict without bound; evict oldest first.
+                overflow = len(tasks) - MAX_TRACKED_TASKS
+                if overflow > 0:
+                    oldest = sorted(tasks, key=lambda t: tasks[t].get('created_at', now))
+                    for tid in oldest[:overflow]:
+                        stale.append((tid, tasks.pop(tid)))
+
+            # Lock released: wake waiters and delete files without blocking
+            # request handlers
+            for tid, task in stale:
+                _mark_removed(tid, task)
+                if task.get('tmpdir') and os.path.exists(task['tmpdir']):
                     shutil.rmtree(task['tmpdir'], ignore_errors=True)
                     logger.info(f"Auto-cleaned stale task {tid}")
-            
-            if stale_ids:
-                logger.info(f"Periodic cleanup: removed {len(stale_ids)} stale tasks")
+
+            if stale:
+                logger.info(f"Periodic cleanup: removed {len(stale)} stale tasks")
         except Exception as e:
             logger.error(f"Periodic cleanup error: {e}")
 
 cleanup_thread = threading.Thread(target=periodic_cleanup, daemon=True)
 cleanup_thread.start()
-logger.info("Periodic cleanup thread started (every 5 min, stale after 30 min)")
+logger.info("Periodic cleanup thread started (adaptive wakeup, finished tasks kept 15 min)")
 
 if __name__ == '__main__':
     logger.info("Starting YouTube Trimmer App")
     logger.info(f"Configuration — Debug: {DEBUG}, Host: {HOST}, Port: {PORT}")
-    app.run(debug=DEBUG, host=HOST, port=PORT)
+    app.run(debug=DEBUG, host=HOST, port=PORT, threaded=True)
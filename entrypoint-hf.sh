@@ -14,4 +14,4 @@ python3 -c "import bgutil_ytdlp_pot_provider; print('PO Token Provider: OK')" 2>
 
 echo "=== Starting gunicorn on port 7860 ==="
 
-exec gunicorn --bind 0.0.0.0:7860 --workers 2 --threads 4 --timeout 600 --access-logfile - --error-logfile - wsgi:app
+exec env PORT=7860 gunicorn -c gunicorn.conf.py wsgi:app
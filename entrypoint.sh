@@ -15,4 +15,4 @@ python -c "import bgutil_ytdlp_pot_provider; print('PO Token Provider: OK')" 2>/
 
 echo "=== Starting gunicorn ==="
 
-exec gunicorn --bind 0.0.0.0:2000 --workers 2 --threads 4 --timeout 600 --access-logfile - --error-logfile - wsgi:app
+exec gunicorn -c gunicorn.conf.py wsgi:app
@@ -0,0 +1,21 @@
+"""Gunicorn configuration for production deployment.
+
+gthread workers let many long-lived SSE progress streams and file
+downloads coexist: each parked stream holds a thread, not a worker
+process, so progress updates stop queuing behind active downloads.
+
+Task state (tasks dict, dedup map, info cache) lives in-process, so the
+default stays at one worker — a second worker would miss roughly half
+the progress/download requests for tasks the other worker created.
+Raise WEB_CONCURRENCY only once task state is shared across processes.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '2000')}"
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+timeout = 0  # long trims must not get a worker killed mid-download
+keepalive = 75
+accesslog = '-'
+errorlog = '-'
@@ -123,6 +123,10 @@ const oBar = $('#oBar');
 const CIRC = 2 * Math.PI * 52; // ~326.73
 
 // ===== LOAD VIDEO =====
+// ETag revalidation cache: url -> { etag, data }. A reload of the same
+// video sends If-None-Match and the server answers 304 with no body.
+const infoCache = new Map();
+
 loadBtn.addEventListener('click', loadVideo);
 urlInput.addEventListener('keydown', e => { if (e.key === 'Enter') loadVideo(); });
 
@@ -141,17 +145,27 @@ async function loadVideo() {
     try {
         console.log('[ClipForge] Fetching video info...');
         const t0 = performance.now();
+        const cached = infoCache.get(url);
+        const headers = { 'Content-Type': 'application/json' };
+        if (cached) headers['If-None-Match'] = cached.etag;
         const res = await fetch('/api/get-video-info', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers,
             body: JSON.stringify({ url })
         });
-        const data = await res.json();
-        console.log('[ClipForge] Video info response:', res.status, data, `(${Math.round(performance.now()-t0)}ms)`);
 
-        if (!res.ok || !data.success) {
-            throw new Error(data.error || 'Failed to load video');
+        let data;
+        if (res.status === 304 && cached) {
+            data = cached.data;
+        } else {
+            data = await res.json();
+            if (!res.ok || !data.success) {
+                throw new Error(data.error || 'Failed to load video');
+            }
+            const etag = res.headers.get('ETag');
+            if (etag) infoCache.set(url, { etag, data });
         }
+        console.log('[ClipForge] Video info response:', res.status, data, `(${Math.round(performance.now()-t0)}ms)`);
 
         state.url = url;
         state.duration = data.duration;